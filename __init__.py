@@ -6,12 +6,32 @@ Automatically splits big UML files into smaller diagrams.
 
 __version__ = "0.1.0"
 
-from .parser import ClangUMLParser
-from .graph_builder import GraphBuilder
-from .analyzer import GraphAnalyzer
-from .filter import DiagramFilter
-from .generator import PumlGenerator
-from .sequence_parser import SequenceDiagramParser, SequenceDiagramGenerator
+import importlib
+
+# Public names are resolved on first access (PEP 562) so that importing the
+# package, e.g. for the sequence-diagram CLI path, does not load NetworkX
+_LAZY_EXPORTS = {
+    "ClangUMLParser": ".parser",
+    "GraphBuilder": ".graph_builder",
+    "GraphAnalyzer": ".analyzer",
+    "DiagramFilter": ".filter",
+    "PumlGenerator": ".generator",
+    "SequenceDiagramParser": ".sequence_parser",
+    "SequenceDiagramGenerator": ".sequence_parser",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 __all__ = [
     "ClangUMLParser",
@@ -4,8 +4,8 @@ Diagram filtering strategies.
 Provides multi-view generation: context-based, per-module, hotspot views, etc.
 """
 
-import networkx as nx
-from typing import Set, Dict, List, Optional
+import itertools
+from typing import Set, Dict, FrozenSet, List, Optional
 from enum import Enum
 
 from .parser import DiagramData
@@ -35,7 +35,45 @@ class DiagramFilter:
         self.data = diagram_data
         self.builder = graph_builder
         self.analyzer = analyzer
-        self.views: Dict[str, Set[str]] = {}
+        self.views: Dict[str, FrozenSet[str]] = {}
+        self._view_pool: Dict[FrozenSet[str], FrozenSet[str]] = {}
+        self.invalidate_name_index()
+    
+    def invalidate_name_index(self):
+        """
+        Rebuild the class-name -> node ID index.
+        Call this after mutating the underlying graph.
+        """
+        names: Dict[str, str] = {}
+        full_names: Dict[str, str] = {}
+        for node_id, elem in self.builder.graph.nodes(data="element"):
+            if elem is None:
+                continue
+            names.setdefault(elem.name, node_id)
+            full_names.setdefault(elem.full_name, node_id)
+        
+        # Fully qualified names win over colliding short names
+        names.update(full_names)
+        names.pop(None, None)
+        self._name_index = names
+    
+    def _store_view(self, view_name: str, nodes: Set[str]) -> FrozenSet[str]:
+        """Store a view as a frozenset, sharing one instance between identical views."""
+        view = frozenset(nodes)
+        view = self._view_pool.setdefault(view, view)
+        old = self.views.get(view_name)
+        self.views[view_name] = view
+        
+        # Release the replaced view from the pool unless another name still shares it
+        if old is not None and old is not view and all(v is not old for v in self.views.values()):
+            del self._view_pool[old]
+        return view
+    
+    def _expand_neighbors(self, seed: Set[str]) -> Set[str]:
+        """Return the seed nodes together with all their direct neighbors."""
+        return set(seed).union(
+            itertools.chain.from_iterable(self.builder.get_neighbors(n) for n in seed)
+        )
     
     def create_context_view(
         self,
@@ -43,7 +81,7 @@ class DiagramFilter:
         max_hops: int = 2,
         direction: str = "both",
         view_name: Optional[str] = None
-    ) -> Set[str]:
+    ) -> FrozenSet[str]:
         """
         Context view: nodes within N hops around a given class.
         
@@ -54,11 +92,7 @@ class DiagramFilter:
             view_name: Optional explicit view name (auto-generated if None).
         """
         # Find internal ID by class name
-        center_id = None
-        for node_id, attrs in self.builder.graph.nodes(data=True):
-            if attrs.get("name") == center_class_name or attrs.get("full_name") == center_class_name:
-                center_id = node_id
-                break
+        center_id = self._name_index.get(center_class_name)
         
         if not center_id:
             raise ValueError(f"Class not found: {center_class_name}")
@@ -69,15 +103,13 @@ class DiagramFilter:
         # Save view
         if view_name is None:
             view_name = f"context_{center_class_name}_h{max_hops}"
-        self.views[view_name] = nodes
-        
-        return nodes
+        return self._store_view(view_name, nodes)
     
     def create_namespace_views(
         self,
         namespace_list: Optional[List[str]] = None,
         min_nodes: int = 2
-    ) -> Dict[str, Set[str]]:
+    ) -> Dict[str, FrozenSet[str]]:
         """
         Create views per namespace.
         
@@ -91,38 +123,47 @@ class DiagramFilter:
         namespace_views = {}
         
         for ns in namespace_list:
+            # Reads the builder's namespace buckets; no per-namespace node scan
             nodes = self.builder.get_nodes_by_namespace(ns)
             
             # Respect minimum node count
             if len(nodes) >= min_nodes:
                 view_name = f"namespace_{ns.replace('::', '_')}"
-                self.views[view_name] = nodes
-                namespace_views[view_name] = nodes
+                namespace_views[view_name] = self._store_view(view_name, nodes)
         
         return namespace_views
     
     def create_community_views(
         self,
         min_community_size: int = 3,
-        resolution: float = 1.0
-    ) -> Dict[str, Set[str]]:
+        resolution: float = 1.0,
+        max_level: int = 10,
+        threshold: float = 1e-4,
+        algorithm: str = "auto"
+    ) -> Dict[str, FrozenSet[str]]:
         """
         Create views per community.
         
         Args:
             min_community_size: Minimum community size.
-            resolution: Resolution parameter for Louvain algorithm.
+            resolution: Resolution parameter for community detection.
+            max_level: Maximum number of Louvain aggregation passes.
+            threshold: Minimum modularity gain to keep aggregating.
+            algorithm: 'auto', 'leiden', or 'louvain'.
         """
-        communities = self.analyzer.detect_communities(resolution)
-        community_members = self.analyzer.get_community_members()
+        community_members = self.analyzer.get_community_members(
+            resolution=resolution,
+            algorithm=algorithm,
+            max_level=max_level,
+            threshold=threshold
+        )
         
         community_views = {}
         
         for comm_id, members in community_members.items():
             if len(members) >= min_community_size:
                 view_name = f"community_{comm_id}"
-                self.views[view_name] = members
-                community_views[view_name] = members
+                community_views[view_name] = self._store_view(view_name, members)
         
         return community_views
     
@@ -131,7 +172,7 @@ class DiagramFilter:
         min_degree: int = 5,
         min_complexity: int = 10,
         include_neighbors: bool = True
-    ) -> Set[str]:
+    ) -> FrozenSet[str]:
         """
         Hotspot view: classes that are good refactoring candidates.
         
@@ -144,22 +185,17 @@ class DiagramFilter:
         
         if include_neighbors:
             # Also include direct neighbors of hotspots
-            extended = set(hotspots)
-            for node in hotspots:
-                extended.update(self.builder.get_neighbors(node))
-            hotspots = extended
+            hotspots = self._expand_neighbors(hotspots)
         
         view_name = "hotspot"
-        self.views[view_name] = hotspots
-        
-        return hotspots
+        return self._store_view(view_name, hotspots)
     
     def create_importance_view(
         self,
         top_n: int = 20,
         metric: str = "pagerank",
         include_neighbors: bool = True
-    ) -> Set[str]:
+    ) -> FrozenSet[str]:
         """
         Importance-based view: top-N most important classes.
         
@@ -173,20 +209,15 @@ class DiagramFilter:
         
         if include_neighbors:
             # Also include direct neighbors of important nodes
-            extended = set(important_nodes)
-            for node in important_nodes:
-                extended.update(self.builder.get_neighbors(node))
-            important_nodes = extended
+            important_nodes = self._expand_neighbors(important_nodes)
         
         view_name = f"importance_{metric}_top{top_n}"
-        self.views[view_name] = important_nodes
-        
-        return important_nodes
+        return self._store_view(view_name, important_nodes)
     
     def create_layer_views(
         self,
         layer_patterns: Dict[str, str]
-    ) -> Dict[str, Set[str]]:
+    ) -> Dict[str, FrozenSet[str]]:
         """
         Layered architecture views (e.g. API, Service, Core).
         
@@ -200,8 +231,7 @@ class DiagramFilter:
             nodes = self.builder.get_nodes_by_namespace(pattern)
             if nodes:
                 view_name = f"layer_{layer_name}"
-                self.views[view_name] = nodes
-                layer_views[view_name] = nodes
+                layer_views[view_name] = self._store_view(view_name, nodes)
         
         return layer_views
     
@@ -210,7 +240,7 @@ class DiagramFilter:
         start_class: str,
         end_class: str,
         expand_hops: int = 1
-    ) -> Optional[Set[str]]:
+    ) -> Optional[FrozenSet[str]]:
         """
         Dependency-chain view: path from A to B plus surrounding context.
         
@@ -238,41 +268,31 @@ class DiagramFilter:
                 nodes.update(self.builder.get_nodes_within_hops(node, expand_hops))
         
         view_name = f"dependency_{start_class}_to_{end_class}"
-        self.views[view_name] = nodes
-        
-        return nodes
+        return self._store_view(view_name, nodes)
     
     def create_god_class_view(
         self,
         threshold_percentile: float = 90,
         include_neighbors: bool = True
-    ) -> Set[str]:
+    ) -> FrozenSet[str]:
         """God-class view: classes with very high complexity."""
         god_classes = self.analyzer.find_god_classes(threshold_percentile)
         
         if include_neighbors:
-            extended = set(god_classes)
-            for node in god_classes:
-                extended.update(self.builder.get_neighbors(node))
-            god_classes = extended
+            god_classes = self._expand_neighbors(god_classes)
         
         view_name = "god_classes"
-        self.views[view_name] = god_classes
-        
-        return god_classes
+        return self._store_view(view_name, god_classes)
     
     def _find_node_id_by_name(self, class_name: str) -> Optional[str]:
         """Find an internal node ID by class name."""
-        for node_id, attrs in self.builder.graph.nodes(data=True):
-            if attrs.get("name") == class_name or attrs.get("full_name") == class_name:
-                return node_id
-        return None
+        return self._name_index.get(class_name)
     
-    def get_view(self, view_name: str) -> Optional[Set[str]]:
+    def get_view(self, view_name: str) -> Optional[FrozenSet[str]]:
         """Get a stored view by name."""
         return self.views.get(view_name)
     
-    def get_all_views(self) -> Dict[str, Set[str]]:
+    def get_all_views(self) -> Dict[str, FrozenSet[str]]:
         """Return a shallow copy of all stored views."""
         return self.views.copy()
     
@@ -282,32 +302,41 @@ class DiagramFilter:
         if not nodes:
             return None
         
-        subgraph = self.builder.get_subgraph_by_nodes(nodes)
+        # Read-only view: no node/edge attribute copies
+        subgraph = self.builder.graph.subgraph(nodes)
+        node_count = len(nodes)
+        edge_count = subgraph.number_of_edges()
+        
+        node_entries = []
+        for node_id in nodes:
+            elem = self.builder.get_element(node_id)
+            node_entries.append({
+                "id": node_id,
+                "name": elem.name if elem else "",
+                "full_name": elem.full_name if elem else ""
+            })
         
         return {
             "view_name": view_name,
-            "node_count": len(nodes),
-            "edge_count": subgraph.number_of_edges(),
-            "density": nx.density(subgraph) if len(nodes) > 1 else 0,
-            "nodes": [
-                {
-                    "id": node_id,
-                    "name": self.builder.graph.nodes[node_id].get("name", ""),
-                    "full_name": self.builder.graph.nodes[node_id].get("full_name", "")
-                }
-                for node_id in nodes
-            ]
+            "node_count": node_count,
+            "edge_count": edge_count,
+            "density": edge_count / (node_count * (node_count - 1)) if node_count > 1 else 0,
+            "nodes": node_entries
         }
     
     def auto_create_views(
         self,
-        strategies: Optional[List[ViewStrategy]] = None
-    ) -> Dict[str, Set[str]]:
+        strategies: Optional[List[ViewStrategy]] = None,
+        max_level: int = 10,
+        threshold: float = 1e-4
+    ) -> Dict[str, FrozenSet[str]]:
         """
         Automatically create multiple standard views.
         
         Args:
             strategies: List of strategies to use (all if None).
+            max_level: Maximum number of Louvain aggregation passes.
+            threshold: Minimum modularity gain to keep aggregating.
         """
         if strategies is None:
             strategies = list(ViewStrategy)
@@ -321,7 +350,10 @@ class DiagramFilter:
                     created_views.update(views)
                 
                 elif strategy == ViewStrategy.COMMUNITY:
-                    views = self.create_community_views()
+                    views = self.create_community_views(
+                        max_level=max_level,
+                        threshold=threshold
+                    )
                     created_views.update(views)
                 
                 elif strategy == ViewStrategy.HOTSPOT:
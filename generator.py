@@ -87,8 +87,8 @@ class PumlGenerator:
         groups = {}
         
         for node_id in node_ids:
-            attrs = self.builder.get_node_attributes(node_id)
-            namespace = attrs.get("namespace", "")
+            element = self.builder.get_element(node_id)
+            namespace = element.namespace if element else ""
             
             # Use only top-level namespace (e.g. app::core::detail -> app::core)
             if namespace:
@@ -111,8 +111,7 @@ class PumlGenerator:
         indent: int = 0
     ) -> List[str]:
         """Generate PlantUML class definition lines for a node."""
-        attrs = self.builder.get_node_attributes(node_id)
-        element: ClassElement = attrs.get("element")
+        element: Optional[ClassElement] = self.builder.get_element(node_id)
         
         if not element:
             return []
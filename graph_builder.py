@@ -4,109 +4,156 @@ NetworkX graph builder
 Converts clang-uml diagram data into a NetworkX graph for analysis.
 """
 
+import sys
+from functools import cached_property
 import networkx as nx
-from typing import Dict, List, Set, Optional
+import numpy as np
+from scipy.sparse import csr_matrix, csgraph
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Set, Optional, Tuple
 from .parser import DiagramData, ClassElement, Relationship
 
 
+# Edge weight per relationship type (stronger coupling = higher weight)
+_REL_WEIGHTS: Dict[str, float] = {
+    "extension": 2.0,      # inheritance (strong coupling)
+    "composition": 1.8,    # composition
+    "aggregation": 1.5,    # aggregation
+    "association": 1.2,    # association
+    "dependency": 0.8,     # dependency (weaker coupling)
+}
+_GET_W = _REL_WEIGHTS.get
+
+
 class GraphBuilder:
     """Convert DiagramData into a NetworkX directed graph."""
     
     def __init__(self, diagram_data: DiagramData):
         self.data = diagram_data
         self.graph = nx.DiGraph()
+        self._ns_buckets: Optional[Dict[str, Set[str]]] = None
+        self._ns_keys: Optional[np.ndarray] = None
+        # The graph is not mutated after construction, so traversal
+        # results are pure functions of their arguments
+        self._neighbor_cache: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self._hop_cache: Dict[Tuple[str, int, str], FrozenSet[str]] = {}
         self._build_graph()
     
     def _build_graph(self):
         """Build the graph nodes and edges."""
-        # Add nodes (classes/interfaces)
+        # Add nodes (classes/interfaces); IDs are interned so every view
+        # and adjacency entry shares one string object per node.
+        # Only the element is stored: scalar attributes are read from it
+        # on demand (see get_node_attributes) instead of being duplicated.
         for elem_id, elem in self.data.elements.items():
-            self.graph.add_node(
-                elem_id,
-                name=elem.name,
-                full_name=elem.full_name,
-                display_name=elem.display_name,
-                namespace=elem.namespace,
-                type=elem.type,
-                is_abstract=elem.is_abstract,
-                is_template=elem.is_template,
-                member_count=elem.member_count,
-                method_count=elem.method_count,
-                complexity=elem.complexity_score,
-                element=elem  # store full element object
-            )
+            self.graph.add_node(sys.intern(elem_id), element=elem)
         
         # Add edges (relationships)
         for rel in self.data.relationships:
             if rel.source in self.graph and rel.destination in self.graph:
                 # Apply weights depending on relationship type
-                weight = self._get_relationship_weight(rel.type)
+                weight = _GET_W(rel.type, 1.0)
                 
+                # type/label/access stay on the relationship object
                 self.graph.add_edge(
-                    rel.source,
-                    rel.destination,
-                    type=rel.type,
-                    label=rel.label,
-                    access=rel.access,
+                    sys.intern(rel.source),
+                    sys.intern(rel.destination),
                     weight=weight,
-                    relationship=rel  # store full relationship object
+                    relationship=rel
                 )
+        
+        # Adjacency dict-of-dicts for traversal without per-call set building
+        self._pred = self.graph.pred
+        self._succ = self.graph.succ
+        
+        self._build_csr()
+    
+    def _build_csr(self):
+        """
+        Build a CSR adjacency matrix (int32 indptr/indices) over node positions
+        so SCC queries run on contiguous arrays in SciPy.
+        """
+        self._idx_to_node: List[str] = list(self.graph.nodes())
+        self._idx: Dict[str, int] = {node_id: i for i, node_id in enumerate(self._idx_to_node)}
+        
+        n = len(self._idx_to_node)
+        edge_count = self.graph.number_of_edges()
+        row = np.fromiter((self._idx[u] for u, _ in self.graph.edges()), dtype=np.int32, count=edge_count)
+        col = np.fromiter((self._idx[v] for _, v in self.graph.edges()), dtype=np.int32, count=edge_count)
+        self._csr = csr_matrix((np.ones(edge_count, dtype=np.int8), (row, col)), shape=(n, n))
     
     def _get_relationship_weight(self, rel_type: str) -> float:
         """Return weight per relationship type (stronger coupling = higher weight)."""
-        weights = {
-            "extension": 2.0,      # inheritance (strong coupling)
-            "composition": 1.8,    # composition
-            "aggregation": 1.5,    # aggregation
-            "association": 1.2,    # association
-            "dependency": 0.8,     # dependency (weaker coupling)
-        }
-        return weights.get(rel_type, 1.0)
+        return _GET_W(rel_type, 1.0)
     
-    def get_neighbors(self, node_id: str, direction: str = "both") -> Set[str]:
+    def get_neighbors(self, node_id: str, direction: str = "both") -> FrozenSet[str]:
         """
-        Get neighbors of a node.
+        Get neighbors of a node (memoized).
 
         direction: 'in', 'out', 'both'
         """
+        key = (node_id, direction)
+        cached = self._neighbor_cache.get(key)
+        if cached is not None:
+            return cached
+        
         if node_id not in self.graph:
-            return set()
+            return frozenset()
         
         if direction == "in":
-            return set(self.graph.predecessors(node_id))
+            neighbors = frozenset(self._pred[node_id])
         elif direction == "out":
-            return set(self.graph.successors(node_id))
+            neighbors = frozenset(self._succ[node_id])
         else:  # both
-            return set(self.graph.predecessors(node_id)) | set(self.graph.successors(node_id))
+            neighbors = frozenset(self._pred[node_id]).union(self._succ[node_id])
+        
+        self._neighbor_cache[key] = neighbors
+        return neighbors
     
-    def get_subgraph_by_nodes(self, node_ids: Set[str]) -> nx.DiGraph:
-        """Return a subgraph induced by a set of node IDs."""
+    def get_subgraph_by_nodes(self, node_ids: Set[str], copy: bool = False) -> nx.DiGraph:
+        """
+        Return a subgraph induced by a set of node IDs.
+        
+        By default this is a read-only view sharing attributes with the full
+        graph; pass copy=True to get an independent, mutable graph.
+        """
         # Filter only existing nodes
-        valid_nodes = [nid for nid in node_ids if nid in self.graph]
-        return self.graph.subgraph(valid_nodes).copy()
+        valid_nodes = self.graph.nodes & node_ids
+        subgraph = self.graph.subgraph(valid_nodes)
+        return subgraph.copy() if copy else subgraph
     
     def get_nodes_within_hops(
         self, 
         center_node: str, 
         max_hops: int = 2,
         direction: str = "both"
-    ) -> Set[str]:
+    ) -> FrozenSet[str]:
         """
-        Find all nodes within N hops from a given node.
+        Find all nodes within N hops from a given node (memoized).
 
         direction: 'in' (dependents), 'out' (dependees), 'both' (bidirectional)
         """
+        key = (center_node, max_hops, direction)
+        cached = self._hop_cache.get(key)
+        if cached is not None:
+            return cached
+        
         if center_node not in self.graph:
-            return set()
+            return frozenset()
         
         visited = {center_node}
         current_layer = {center_node}
+        pred, succ = self._pred, self._succ
         
         for _ in range(max_hops):
             next_layer = set()
-            for node in current_layer:
-                neighbors = self.get_neighbors(node, direction)
-                next_layer.update(neighbors - visited)
+            if direction != "out":
+                for node in current_layer:
+                    next_layer.update(pred[node])
+            if direction != "in":
+                for node in current_layer:
+                    next_layer.update(succ[node])
+            next_layer -= visited
             
             if not next_layer:
                 break
@@ -114,25 +161,44 @@ class GraphBuilder:
             visited.update(next_layer)
             current_layer = next_layer
         
-        return visited
+        result = frozenset(visited)
+        self._hop_cache[key] = result
+        return result
+    
+    def _get_namespace_buckets(self) -> Dict[str, Set[str]]:
+        """Group node IDs by exact namespace (built once, in a single pass)."""
+        if self._ns_buckets is None:
+            buckets = defaultdict(set)
+            for node_id, elem in self.graph.nodes(data="element"):
+                buckets[(elem.namespace if elem is not None else None) or ""].add(node_id)
+            self._ns_buckets = dict(buckets)
+            # Distinct namespaces as a string array for vectorized prefix tests
+            self._ns_keys = np.array(list(self._ns_buckets), dtype=str)
+        return self._ns_buckets
     
     def get_nodes_by_namespace(self, namespace_pattern: str) -> Set[str]:
         """Return nodes whose namespace starts with the given pattern."""
-        matching_nodes = set()
-        
-        for node_id, attrs in self.graph.nodes(data=True):
-            namespace = attrs.get("namespace", "")
-            if namespace.startswith(namespace_pattern):
-                matching_nodes.add(node_id)
-        
-        return matching_nodes
+        buckets = self._get_namespace_buckets()
+        mask = np.char.startswith(self._ns_keys, namespace_pattern)
+        return set().union(*(buckets[ns] for ns in self._ns_keys[mask].tolist()))
+    
+    @cached_property
+    def sccs(self) -> List[Set[str]]:
+        """Strongly connected components, computed once and shared by all callers."""
+        count, labels = csgraph.connected_components(self._csr, directed=True, connection="strong")
+        sccs = [set() for _ in range(count)]
+        for node_id, label in zip(self._idx_to_node, labels.tolist()):
+            sccs[label].add(node_id)
+        return sccs
     
     def find_strongly_connected_components(self) -> List[Set[str]]:
         """Find strongly connected components (cycle dependencies)."""
-        return list(nx.strongly_connected_components(self.graph))
+        return list(self.sccs)
     
     def find_shortest_path(self, source: str, target: str) -> Optional[List[str]]:
         """Find shortest path between two nodes."""
+        # Bidirectional BFS stops as soon as the frontiers meet, which beats
+        # a full single-source BFS over the CSR matrix for point queries
         try:
             return nx.shortest_path(self.graph, source, target)
         except (nx.NetworkXNoPath, nx.NodeNotFound):
@@ -146,27 +212,66 @@ class GraphBuilder:
         """Number of outgoing edges (number of dependees)."""
         return self.graph.out_degree(node_id) if node_id in self.graph else 0
     
-    def get_node_attributes(self, node_id: str) -> Dict:
-        """Return all attributes of a node."""
+    def get_element(self, node_id: str) -> Optional[ClassElement]:
+        """Return the ClassElement stored on a node (None if unknown)."""
         if node_id not in self.graph:
+            return None
+        return self.graph.nodes[node_id].get("element")
+    
+    def get_node_attributes(self, node_id: str) -> Dict:
+        """Return all attributes of a node, resolved from its element."""
+        elem = self.get_element(node_id)
+        if elem is None:
             return {}
-        return dict(self.graph.nodes[node_id])
+        return {
+            "name": elem.name,
+            "full_name": elem.full_name,
+            "display_name": elem.display_name,
+            "namespace": elem.namespace,
+            "type": elem.type,
+            "is_abstract": elem.is_abstract,
+            "is_template": elem.is_template,
+            "member_count": elem.member_count,
+            "method_count": elem.method_count,
+            "complexity": elem.complexity_score,
+            "element": elem,
+        }
     
     def get_statistics(self) -> Dict:
         """Return basic statistics of the graph."""
+        # A DAG is exactly a graph whose SCCs are all singletons without self-loops
+        node_count = self.graph.number_of_nodes()
+        edge_count = self.graph.number_of_edges()
+        scc_count = len(self.sccs)
+        is_dag = scc_count == node_count and nx.number_of_selfloops(self.graph) == 0
+        
+        # Every edge adds one in- and one out-degree, so both averages are E/V
+        avg_degree = edge_count / node_count if node_count > 0 else 0
+        
         return {
-            "node_count": self.graph.number_of_nodes(),
-            "edge_count": self.graph.number_of_edges(),
+            "node_count": node_count,
+            "edge_count": edge_count,
             "density": nx.density(self.graph),
-            "is_dag": nx.is_directed_acyclic_graph(self.graph),
-            "scc_count": len(list(nx.strongly_connected_components(self.graph))),
-            "avg_in_degree": sum(d for _, d in self.graph.in_degree()) / self.graph.number_of_nodes() if self.graph.number_of_nodes() > 0 else 0,
-            "avg_out_degree": sum(d for _, d in self.graph.out_degree()) / self.graph.number_of_nodes() if self.graph.number_of_nodes() > 0 else 0,
+            "is_dag": is_dag,
+            "scc_count": scc_count,
+            "avg_in_degree": avg_degree,
+            "avg_out_degree": avg_degree,
         }
     
     def export_to_graphml(self, filepath: str):
         """Export the graph into GraphML format (e.g. for yEd)."""
-        nx.write_graphml(self.graph, filepath)
+        # GraphML only holds scalar attributes, so export a flattened copy
+        # without the element/relationship objects (and without None values)
+        export = nx.DiGraph()
+        for node_id in self.graph:
+            attrs = self.get_node_attributes(node_id)
+            attrs.pop("element", None)
+            export.add_node(node_id, **{k: v for k, v in attrs.items() if v is not None})
+        for u, v, data in self.graph.edges(data=True):
+            rel = data["relationship"]
+            attrs = {"type": rel.type, "label": rel.label, "access": rel.access, "weight": data["weight"]}
+            export.add_edge(u, v, **{k: val for k, val in attrs.items() if val is not None})
+        nx.write_graphml(export, filepath)
     
     def get_graph(self) -> nx.DiGraph:
         """Return the internal NetworkX graph object."""
@@ -193,7 +298,7 @@ if __name__ == "__main__":
         
         # Print neighbors of the first element
         if data.elements:
-            first_id = list(data.elements.keys())[0]
+            first_id = next(iter(data.elements))
             first_elem = data.elements[first_id]
             neighbors = builder.get_neighbors(first_id)
             print(f"\nNeighbors of {first_elem.name}: {len(neighbors)}")
@@ -5,19 +5,33 @@ UML processor CLI
 Analyze clang-uml JSON files and generate multi-view UML diagrams.
 """
 
+import re
 import sys
-import json
+import time
 import argparse
-import yaml
 from pathlib import Path
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Optional
 
-from .parser import ClangUMLParser
-from .graph_builder import GraphBuilder
-from .analyzer import GraphAnalyzer
-from .filter import DiagramFilter, ViewStrategy
-from .generator import PumlGenerator
-from .sequence_parser import SequenceDiagramParser, SequenceDiagramGenerator
+from .parser import load_json_file, save_json_file
+
+# The class-diagram pipeline pulls in NetworkX/NumPy/SciPy and yaml is only
+# needed with a config file, so those are imported where they are used
+if TYPE_CHECKING:
+    from .analyzer import GraphAnalyzer
+    from .filter import DiagramFilter
+
+
+_DIAGRAM_TYPE_RE = re.compile(rb'"diagram_type"\s*:\s*"([^"]+)"')
+_PLANTUML_ERROR_RE = re.compile(r"Error line (\d+) in file: (.+)")
+
+
+def detect_diagram_type(input_file: Path) -> Optional[str]:
+    """Read diagram_type from the head of a JSON file without parsing it."""
+    # clang-uml emits object keys sorted, so diagram_type sits near the top
+    with open(input_file, 'rb') as f:
+        head = f.read(4096)
+    match = _DIAGRAM_TYPE_RE.search(head)
+    return match.group(1).decode() if match else None
 
 
 def load_config(config_path: Path) -> Dict[str, Any]:
@@ -26,13 +40,15 @@ def load_config(config_path: Path) -> Dict[str, Any]:
         print(f"⚠️ Config file not found: {config_path}")
         return {}
     
+    import yaml
+    
     with open(config_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
 
 def generate_analysis_report(
-    analyzer: GraphAnalyzer,
-    filter_obj: DiagramFilter,
+    analyzer: "GraphAnalyzer",
+    filter_obj: Optional["DiagramFilter"],
     output_path: Path,
     format: str = "markdown"
 ):
@@ -86,12 +102,11 @@ def generate_analysis_report(
         output_path.write_text("\n".join(lines), encoding='utf-8')
     
     elif format == "json":
-        import json
         report = {
             "summary": summary,
             "namespace_coupling": namespace_coupling
         }
-        output_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        save_json_file(output_path, report)
 
 
 def run_plantuml(puml_files: list, plantuml_jar: str):
@@ -107,15 +122,43 @@ def run_plantuml(puml_files: list, plantuml_jar: str):
         print("  Skipping SVG generation.")
         return
     
+    if not puml_files:
+        return
+    
     print("\n📊 Generating SVGs with PlantUML...")
     
+    # One JVM for all files: startup cost is paid once, not per diagram
+    cmd = ["java", "-jar", plantuml_jar, "-tsvg", *map(str, puml_files)]
+    started = time.time()
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        # PlantUML keeps going after a bad file and still writes an error
+        # image for it, so take the failures from its "Error line N in
+        # file: ..." messages rather than from which SVGs exist
+        stderr = e.stderr.decode(errors="replace")
+        errors: Dict[str, list] = {}
+        for match in _PLANTUML_ERROR_RE.finditer(stderr):
+            errors.setdefault(Path(match.group(2).strip()).name, []).append(match.group(1))
+        
+        print(f"  ✗ PlantUML exited with status {e.returncode}")
+        for puml_file in puml_files:
+            svg_file = puml_file.with_suffix(".svg")
+            if puml_file.name in errors:
+                print(f"  ✗ {puml_file.name}: error at line {', '.join(errors[puml_file.name])}")
+            # SVGs left over from earlier runs don't count (1 s slack for coarse mtimes)
+            elif svg_file.exists() and svg_file.stat().st_mtime >= started - 1:
+                print(f"  ✓ {puml_file.name}")
+            else:
+                print(f"  ✗ {puml_file.name}: no SVG written")
+        if not errors:
+            # Unrecognized failure (e.g. java itself): show PlantUML's output
+            for line in stderr.splitlines():
+                print(f"    {line}")
+        return
+    
     for puml_file in puml_files:
-        try:
-            cmd = ["java", "-jar", plantuml_jar, "-tsvg", str(puml_file)]
-            subprocess.run(cmd, check=True, capture_output=True)
-            print(f"  ✓ {puml_file.name}")
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ {puml_file.name}: {e}")
+        print(f"  ✓ {puml_file.name}")
 
 
 def main():
@@ -171,13 +214,15 @@ def main():
     print()
     
     # 0. Detect diagram type
-    with open(input_file, 'r', encoding='utf-8') as f:
-        raw_json = json.load(f)
-    
-    diagram_type = raw_json.get("diagram_type", "class")
+    diagram_type = detect_diagram_type(input_file)
+    if diagram_type is None:
+        # Not in the file head: fall back to a full parse
+        diagram_type = load_json_file(input_file).get("diagram_type", "class")
     
     # Sequence diagram path
     if diagram_type == "sequence":
+        from .sequence_parser import SequenceDiagramParser, SequenceDiagramGenerator
+        
         print("📊 Sequence diagram mode")
         print()
         
@@ -204,6 +249,12 @@ def main():
         return
     
     # Class diagram path (original logic)
+    from .parser import ClangUMLParser
+    from .graph_builder import GraphBuilder
+    from .analyzer import GraphAnalyzer
+    from .filter import DiagramFilter
+    from .generator import PumlGenerator
+    
     print("📊 Class diagram mode")
     print()
     
@@ -222,7 +273,10 @@ def main():
     
     # 3. Analyze graph
     print("3️⃣ Analyzing graph...")
-    analyzer = GraphAnalyzer(builder.get_graph())
+    analyzer = GraphAnalyzer(
+        builder.get_graph(),
+        cache_dir=config.get("analysis", {}).get("cache_dir")
+    )
     analysis_summary = analyzer.get_analysis_summary()
     print(f"   ✓ Communities: {analysis_summary['communities_count']}")
     print(f"   ✓ Hotspots: {analysis_summary['hotspots_count']}")
@@ -256,7 +310,13 @@ def main():
     # Community views
     if views_config.get("community", {}).get("enabled", True):
         min_size = views_config.get("community", {}).get("min_size", 3)
-        views = filter_obj.create_community_views(min_community_size=min_size)
+        views = filter_obj.create_community_views(
+            min_community_size=min_size,
+            resolution=views_config.get("community", {}).get("resolution", 1.0),
+            max_level=views_config.get("community", {}).get("max_level", 10),
+            threshold=views_config.get("community", {}).get("threshold", 1e-4),
+            algorithm=views_config.get("community", {}).get("algorithm", "auto")
+        )
         all_views.update(views)
         print(f"   ✓ Community views: {len(views)}")
     
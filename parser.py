@@ -9,8 +9,30 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 
+try:
+    import orjson  # optional: C JSON parser, several times faster on large files
+except ImportError:
+    orjson = None
 
-@dataclass
+
+def load_json_file(filepath: Path) -> Any:
+    """Load a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(filepath).read_bytes())
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json_file(filepath: Path, data: Any):
+    """Write data as indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        # Encodes straight to UTF-8 bytes; no intermediate str copy
+        Path(filepath).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    Path(filepath).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+@dataclass(slots=True)
 class ClassElement:
     """Data class representing a class/interface element."""
     id: str
@@ -46,7 +68,7 @@ class ClassElement:
         return self.member_count + self.method_count + len(self.bases)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Relationship:
     """Data class representing a relationship between classes."""
     source: str
@@ -60,7 +82,7 @@ class Relationship:
         return f"{self.source} --{self.type}{label_str}--> {self.destination}"
 
 
-@dataclass
+@dataclass(slots=True)
 class DiagramData:
     """Container for all class diagram data."""
     name: str
@@ -106,9 +128,7 @@ class ClangUMLParser:
     
     def parse_file(self, filepath: Path) -> DiagramData:
         """Parse a JSON file into diagram data."""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-        
+        raw_data = load_json_file(filepath)
         return self.parse_dict(raw_data, filepath.stem)
     
     def parse_dict(self, raw_data: Dict[str, Any], name: str = "diagram") -> DiagramData:
@@ -4,13 +4,18 @@ clang-uml sequence diagram JSON parser
 Parser and data structures specialized for sequence diagrams.
 """
 
-import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 
+from .parser import load_json_file
 
-@dataclass
+
+# Keys holding nested message items, in reverse traversal order
+_NESTED_KEYS_REVERSED = ("loop_blocks", "case_blocks", "else_blocks", "if_blocks", "messages")
+
+
+@dataclass(slots=True, frozen=True)
 class Participant:
     """Participant in a sequence diagram (class, function, method, etc.)."""
     id: str
@@ -26,7 +31,7 @@ class Participant:
         return self.name
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Message:
     """Message in a sequence diagram (function call, return, etc.)."""
     from_id: str
@@ -41,7 +46,7 @@ class Message:
         return f"{self.from_id} -> {self.to_id}: {self.name}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Activity:
     """Activity block (conditions, loops, etc.)."""
     type: str  # if, loop, alt, opt, etc.
@@ -50,15 +55,37 @@ class Activity:
     condition: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SequenceDiagramData:
-    """Container for all sequence diagram data."""
+    """
+    Container for all sequence diagram data.
+    
+    Lookup indexes are built from `participants` and `messages` at
+    construction; do not mutate or reassign them afterwards.
+    """
     name: str
     diagram_type: str
     participants: Dict[str, Participant]
     messages: List[Message]
     metadata: Dict[str, Any]
     start_from: Optional[str] = None  # starting function/method
+    _name_index: Dict[str, Participant] = field(init=False, repr=False, compare=False)
+    _from_idx: Dict[str, List[Message]] = field(init=False, repr=False, compare=False)
+    _to_idx: Dict[str, List[Message]] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Name/full name -> participant; the first participant in order wins
+        self._name_index = {}
+        for p in self.participants.values():
+            self._name_index.setdefault(p.name, p)
+            self._name_index.setdefault(p.full_name, p)
+        
+        # Sender/receiver -> messages, in message order
+        self._from_idx = {}
+        self._to_idx = {}
+        for m in self.messages:
+            self._from_idx.setdefault(m.from_id, []).append(m)
+            self._to_idx.setdefault(m.to_id, []).append(m)
     
     @property
     def participant_count(self) -> int:
@@ -70,18 +97,15 @@ class SequenceDiagramData:
     
     def get_participant_by_name(self, name: str) -> Optional[Participant]:
         """Find participant by name."""
-        for p in self.participants.values():
-            if p.name == name or p.full_name == name:
-                return p
-        return None
+        return self._name_index.get(name)
     
     def get_calls_from(self, participant_id: str) -> List[Message]:
         """Get messages sent by a specific participant."""
-        return [m for m in self.messages if m.from_id == participant_id]
+        return list(self._from_idx.get(participant_id, ()))
     
     def get_calls_to(self, participant_id: str) -> List[Message]:
         """Get messages received by a specific participant."""
-        return [m for m in self.messages if m.to_id == participant_id]
+        return list(self._to_idx.get(participant_id, ()))
 
 
 class SequenceDiagramParser:
@@ -92,9 +116,7 @@ class SequenceDiagramParser:
     
     def parse_file(self, filepath: Path) -> SequenceDiagramData:
         """Parse a JSON file into sequence diagram data."""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-        
+        raw_data = load_json_file(filepath)
         return self.parse_dict(raw_data, filepath.stem)
     
     def parse_dict(self, raw_data: Dict[str, Any], name: str = "sequence") -> SequenceDiagramData:
@@ -105,7 +127,7 @@ class SequenceDiagramParser:
             p = self._parse_participant(p_data)
             participants[p.id] = p
         
-        # Parse messages (recursively traverse activities and blocks)
+        # Parse messages (traverse nested activities and blocks)
         messages = []
         for seq_item in raw_data.get("sequences", []):
             messages.extend(self._extract_messages(seq_item))
@@ -132,34 +154,33 @@ class SequenceDiagramParser:
             namespace=p_data.get("namespace")
         )
     
-    def _extract_messages(self, item: Dict[str, Any], messages: Optional[List[Message]] = None) -> List[Message]:
-        """Recursively extract messages from an item."""
-        if messages is None:
-            messages = []
-        
-        # Direct message node
-        if item.get("type") in ["call", "return"]:
-            msg = Message(
-                from_id=item.get("from", {}).get("id", ""),
-                to_id=item.get("to", {}).get("id", ""),
-                name=item.get("name", ""),
-                type=item.get("type", "call"),
-                message_scope=item.get("scope"),
-                return_type=item.get("return_type"),
-                source_location=item.get("source_location")
-            )
-            messages.append(msg)
-        
-        # Traverse nested activity blocks
-        if "messages" in item:
-            for sub_item in item["messages"]:
-                self._extract_messages(sub_item, messages)
+    def _extract_messages(self, root: Dict[str, Any]) -> List[Message]:
+        """Extract messages from an item and its nested blocks, in document order."""
+        messages = []
+        stack = [root]
         
-        # Condition/loop and other blocks
-        for key in ["if_blocks", "else_blocks", "case_blocks", "loop_blocks"]:
-            if key in item:
-                for block in item[key]:
-                    self._extract_messages(block, messages)
+        while stack:
+            item = stack.pop()
+            item_type = item.get("type")
+            
+            # Direct message node
+            if item_type == "call" or item_type == "return":
+                messages.append(Message(
+                    from_id=item.get("from", {}).get("id", ""),
+                    to_id=item.get("to", {}).get("id", ""),
+                    name=item.get("name", ""),
+                    type=item_type,
+                    message_scope=item.get("scope"),
+                    return_type=item.get("return_type"),
+                    source_location=item.get("source_location")
+                ))
+            
+            # Nested activity messages, then condition/loop and other blocks.
+            # Pushed in reverse so they are popped in document order.
+            for key in _NESTED_KEYS_REVERSED:
+                children = item.get(key)
+                if children:
+                    stack.extend(reversed(children))
         
         return messages
     
@@ -208,23 +229,27 @@ class SequenceDiagramGenerator:
         
         # Declare participants
         participants = self.data.participants
+        messages = self.data.messages
         if participant_filter:
             participants = {k: v for k, v in participants.items() if k in participant_filter}
+            messages = [
+                m for m in messages
+                if m.from_id in participant_filter and m.to_id in participant_filter
+            ]
         
-        for p in participants.values():
+        # Build each alias once instead of twice per message
+        aliases = {pid: self._get_alias(pid) for pid in participants}
+        
+        for pid, p in participants.items():
             p_type = "participant" if p.type == "class" else "participant"
-            lines.append(f'{p_type} "{p.display_name or p.name}" as {self._get_alias(p.id)}')
+            lines.append(f'{p_type} "{p.display_name or p.name}" as {aliases[pid]}')
         
         lines.append("")
         
         # Messages
-        for msg in self.data.messages:
-            # Filter messages if needed
-            if participant_filter and (msg.from_id not in participant_filter or msg.to_id not in participant_filter):
-                continue
-            
-            from_alias = self._get_alias(msg.from_id)
-            to_alias = self._get_alias(msg.to_id)
+        for msg in messages:
+            from_alias = aliases.get(msg.from_id) or self._get_alias(msg.from_id)
+            to_alias = aliases.get(msg.to_id) or self._get_alias(msg.to_id)
             
             if msg.type == "return":
                 lines.append(f"{to_alias} --> {from_alias}: {msg.name}")